@@ -1,6 +1,7 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
+import torch.fx
 from torch.utils.data import Dataset, DataLoader
 import numpy as np
 import pandas as pd
@@ -11,6 +12,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy.signal import savgol_filter
 import os
+import copy
+import importlib.util
 from tqdm import tqdm
 
 # 设置随机种子，保证结果可复现
@@ -18,9 +21,14 @@ seed=2
 torch.manual_seed(seed)
 np.random.seed(seed)
 
+# 是否用torch.compile编译训练模型（仅CUDA且安装了Triton时生效）
+# 数据集很小，编译和CUDA Graphs捕获的预热开销未必能被训练加速抵消，默认关闭
+use_torch_compile = False
+
 # 设置中文字体，确保中文显示正常
 plt.rcParams["font.family"] = ["SimHei", "WenQuanYi Micro Hei", "Heiti TC"]
 plt.rcParams["axes.unicode_minus"] = False  # 确保负号显示正常
+plt.rcParams["agg.path.chunksize"] = 10000  # 分块渲染长折线，加快光谱曲线绘制
 
 class NIRSpectroscopyDataset(Dataset):
     """近红外光谱数据集"""
@@ -64,19 +72,19 @@ class EnhancedCNNModel(nn.Module):
         # 第一组卷积层 - 捕捉局部特征
         self.conv1 = nn.Conv1d(1, 32, kernel_size=11, stride=1, padding=5)
         self.bn1 = nn.BatchNorm1d(32)
-        self.relu1 = nn.LeakyReLU(0.1)
+        self.relu1 = nn.LeakyReLU(0.1, inplace=True)
         self.dropout1 = nn.Dropout(0.2)
         
         # 第二组卷积层 - 捕捉更高级特征
         self.conv2 = nn.Conv1d(32, 64, kernel_size=7, stride=1, padding=3)
         self.bn2 = nn.BatchNorm1d(64)
-        self.relu2 = nn.LeakyReLU(0.1)
+        self.relu2 = nn.LeakyReLU(0.1, inplace=True)
         self.dropout2 = nn.Dropout(0.2)
         
         # 第三组卷积层 - 进一步提取特征
         self.conv3 = nn.Conv1d(64, 128, kernel_size=5, stride=1, padding=2)
         self.bn3 = nn.BatchNorm1d(128)
-        self.relu3 = nn.LeakyReLU(0.1)
+        self.relu3 = nn.LeakyReLU(0.1, inplace=True)
         self.pool3 = nn.MaxPool1d(kernel_size=2)
         
         # 计算全连接层输入大小
@@ -85,12 +93,12 @@ class EnhancedCNNModel(nn.Module):
         # 全连接层进行预测
         self.fc1 = nn.Linear(fc_input_size, 256)
         self.bn4 = nn.BatchNorm1d(256)
-        self.relu4 = nn.LeakyReLU(0.1)
+        self.relu4 = nn.LeakyReLU(0.1, inplace=True)
         self.dropout4 = nn.Dropout(0.5)
         
         self.fc2 = nn.Linear(256, 128)
         self.bn5 = nn.BatchNorm1d(128)
-        self.relu5 = nn.LeakyReLU(0.1)
+        self.relu5 = nn.LeakyReLU(0.1, inplace=True)
         self.dropout5 = nn.Dropout(0.5)
         
         self.fc3 = nn.Linear(128, output_size)
@@ -134,14 +142,67 @@ class EnhancedCNNModel(nn.Module):
         x = self.fc3(x)
         
         return x
+    
+    def fuse(self):
+        """
+        推理阶段将BatchNorm层融合进其前面的卷积层/全连接层
+        BN在推理时是固定的仿射变换，可直接吸收进前一层的权重和偏置：
+            W' = W * gamma / sqrt(var + eps)
+            b' = (b - mean) * gamma / sqrt(var + eps) + beta
+        Returns:
+            融合后的模型（就地修改）
+        """
+        self.eval()
+        
+        with torch.no_grad():
+            for layer_name, bn_name in self._bn_fusion_pairs():
+                layer = getattr(self, layer_name)
+                bn = getattr(self, bn_name)
+                
+                factor = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+                # 按输出通道缩放权重，兼容Conv1d [out, in, k] 和 Linear [out, in]
+                layer.weight.mul_(factor.view(-1, *([1] * (layer.weight.dim() - 1))))
+                
+                bias = layer.bias if layer.bias is not None else torch.zeros_like(bn.running_mean)
+                fused_bias = (bias - bn.running_mean) * factor + bn.bias
+                layer.bias = nn.Parameter(fused_bias)
+                
+                setattr(self, bn_name, nn.Identity())
+        
+        return self
+    
+    def _bn_fusion_pairs(self):
+        """
+        用torch.fx符号追踪前向计算图，查找 Conv1d/Linear -> BatchNorm1d 的可融合层对
+        要求前一层的输出只被该BN使用；已融合的BN被替换为Identity，不会再次匹配
+        Returns:
+            (层名称, BN层名称) 列表
+        """
+        traced = torch.fx.symbolic_trace(self)
+        modules = dict(traced.named_modules())
+        pairs = []
+        
+        for node in traced.graph.nodes:
+            if node.op != 'call_module' or not isinstance(modules[node.target], nn.BatchNorm1d):
+                continue
+            prev = node.args[0]
+            if (isinstance(prev, torch.fx.Node) and prev.op == 'call_module'
+                    and isinstance(modules[prev.target], (nn.Conv1d, nn.Linear))
+                    and len(prev.users) == 1):
+                pairs.append((prev.target, node.target))
+        
+        return pairs
 
-def load_and_preprocess_data(file_path, apply_smoothing=True, apply_snv=True):
+def load_and_preprocess_data(file_path, apply_smoothing=True, apply_snv=True, batch_size=32, test_batch_size=None, plot=False):
     """
     加载并预处理光谱数据，增加了更多预处理选项
     Args:
         file_path: Excel文件路径
         apply_smoothing: 是否应用Savitzky-Golay平滑
         apply_snv: 是否应用标准正态变量变换
+        batch_size: 训练集批大小，不超过训练集样本数
+        test_batch_size: 测试集批大小，默认为None即整个测试集作为一个批次
+        plot: 是否绘制并保存各预处理阶段的光谱图
     Returns:
         训练集和测试集的加载器，以及数据标准化器
     """
@@ -161,8 +222,9 @@ def load_and_preprocess_data(file_path, apply_smoothing=True, apply_snv=True):
     df.info()
     
     # 提取光谱数据（假设光谱数据从第5列开始到最后一列）
+    # 统一转为连续的float32数组，后续平滑、SNV、标准化均沿用该精度并尽量就地计算
     spectra_columns = df.columns[4:]
-    spectra = df[spectra_columns].values
+    spectra = np.ascontiguousarray(df[spectra_columns].values, dtype=np.float32)
     
     # 提取目标成分数据
     try:
@@ -171,27 +233,31 @@ def load_and_preprocess_data(file_path, apply_smoothing=True, apply_snv=True):
         raise KeyError(f"找不到目标成分列: {e}")
     
     # 可视化原始光谱数据
-    plot_spectra(spectra, spectra_columns, title="原始光谱数据")
+    if plot:
+        plot_spectra(spectra, spectra_columns, title="原始光谱数据")
     
     # 应用Savitzky-Golay平滑
     if apply_smoothing:
         spectra = savgol_filter(spectra, window_length=7, polyorder=3, deriv=0)
-        plot_spectra(spectra, spectra_columns, title="Savitzky-Golay平滑后的光谱数据")
+        if plot:
+            plot_spectra(spectra, spectra_columns, title="Savitzky-Golay平滑后的光谱数据")
     
     # 应用标准正态变量变换(SNV)
     if apply_snv:
-        spectra = snv_transform(spectra)
-        plot_spectra(spectra, spectra_columns, title="SNV变换后的光谱数据")
+        spectra = snv_transform(spectra, copy=False)
+        if plot:
+            plot_spectra(spectra, spectra_columns, title="SNV变换后的光谱数据")
     
     # 数据标准化
-    scaler_spectra = StandardScaler()
+    scaler_spectra = StandardScaler(copy=False)  # 就地标准化，避免再复制一份光谱矩阵
     scaler_targets = StandardScaler()
     
     spectra_scaled = scaler_spectra.fit_transform(spectra)
     targets_scaled = scaler_targets.fit_transform(targets)
     
     # 可视化标准化后的光谱数据
-    plot_spectra(spectra_scaled, spectra_columns, title="标准化后的光谱数据")
+    if plot:
+        plot_spectra(spectra_scaled, spectra_columns, title="标准化后的光谱数据")
     
     # 划分训练集和测试集
     X_train, X_test, y_train, y_test = train_test_split(
@@ -200,28 +266,45 @@ def load_and_preprocess_data(file_path, apply_smoothing=True, apply_snv=True):
     print(f"训练集大小: {X_train.shape[0]}, 测试集大小: {X_test.shape[0]}")
     
     # 转换为PyTorch张量
-    X_train_tensor = torch.FloatTensor(X_train)
-    y_train_tensor = torch.FloatTensor(y_train)
-    X_test_tensor = torch.FloatTensor(X_test)
-    y_test_tensor = torch.FloatTensor(y_test)
+    # 光谱数据已是float32，直接共享内存；目标数据为float64，需转换一次
+    X_train_tensor = torch.from_numpy(X_train)
+    y_train_tensor = torch.as_tensor(y_train, dtype=torch.float32)
+    X_test_tensor = torch.from_numpy(X_test)
+    y_test_tensor = torch.as_tensor(y_test, dtype=torch.float32)
     
     # 创建数据集
     train_dataset = NIRSpectroscopyDataset(X_train_tensor, y_train_tensor)
     test_dataset = NIRSpectroscopyDataset(X_test_tensor, y_test_tensor)
     
-    # 创建数据加载器
-    train_loader = DataLoader(train_dataset, batch_size=8, shuffle=True)
-    test_loader = DataLoader(test_dataset, batch_size=8, shuffle=False)
+    # 创建数据加载器（GPU可用时使用锁页内存，以便异步拷贝到显存）
+    pin_memory = torch.cuda.is_available()
+    if test_batch_size is None:
+        test_batch_size = len(test_dataset)
+    batch_size = min(batch_size, len(train_dataset))
+    train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True, pin_memory=pin_memory)
+    test_loader = DataLoader(test_dataset, batch_size=test_batch_size, shuffle=False, pin_memory=pin_memory)
     
     return train_loader, test_loader, scaler_spectra, scaler_targets, X_test, y_test, spectra_columns
 
-def snv_transform(spectra):
+def snv_transform(spectra, copy=True):
     """
     标准正态变量变换(SNV)，用于消除颗粒大小、光散射等影响
+    Args:
+        spectra: 光谱数据 [样本数, 波长数]
+        copy: 为False时，若输入已是连续的float32数组则直接就地修改输入
+    Returns:
+        SNV变换后的光谱数据（float32）
     """
-    mean = np.mean(spectra, axis=1).reshape(-1, 1)
-    std = np.std(spectra, axis=1).reshape(-1, 1)
-    return (spectra - mean) / std
+    # 转为连续的float32数组并就地计算，减少内存带宽和临时数组
+    if copy:
+        spectra = np.array(spectra, dtype=np.float32, order='C')
+    else:
+        spectra = np.ascontiguousarray(spectra, dtype=np.float32)
+    mean = spectra.mean(axis=1, keepdims=True)
+    std = spectra.std(axis=1, keepdims=True)
+    np.subtract(spectra, mean, out=spectra)
+    np.divide(spectra, std, out=spectra)
+    return spectra
 
 def plot_spectra(spectra, wavelengths, title="光谱数据"):
     """
@@ -241,7 +324,7 @@ def plot_spectra(spectra, wavelengths, title="光谱数据"):
     
     # 确保标题包含有效字符，避免文件命名错误
     safe_title = "".join([c for c in title if c.isalnum() or c in [" ", "_", "-"]]).strip()
-    plt.savefig(f"{safe_title}.png", dpi=300)
+    plt.savefig(f"{safe_title}.png", dpi=120)
     plt.close()
 
 def train_model(model, train_loader, criterion, optimizer, device, epochs=100, scheduler=None):
@@ -259,28 +342,40 @@ def train_model(model, train_loader, criterion, optimizer, device, epochs=100, s
         训练历史记录
     """
     model.train()
+    # torch.compile包装后的模型参数键带有'_orig_mod.'前缀，检查点统一从原始模块读写
+    base_model = getattr(model, '_orig_mod', model)
     train_history = {'loss': []}
     best_loss = float('inf')
+    best_state = None
     patience = 20  # 早停等待轮数
     counter = 0
     
+    # 混合精度训练：GPU上使用FP16/BF16自动混合精度，CPU上保持FP32
+    use_amp = device.type == 'cuda'
+    # 仅在具备原生BF16 Tensor Core的GPU（Ampere及以上）上使用BF16，避免在Volta/Turing上走软件模拟
+    amp_dtype = torch.bfloat16 if use_amp and torch.cuda.get_device_capability(device)[0] >= 8 else torch.float16
+    # BF16动态范围与FP32一致，无需梯度缩放
+    scaler = torch.amp.GradScaler('cuda', enabled=use_amp and amp_dtype == torch.float16)
+    
     for epoch in range(epochs):
         running_loss = 0.0
         progress_bar = tqdm(enumerate(train_loader), total=len(train_loader))
         
         for i, (inputs, labels) in progress_bar:
-            inputs, labels = inputs.to(device), labels.to(device)
+            inputs, labels = inputs.to(device, non_blocking=True), labels.to(device, non_blocking=True)
             
             # 清零梯度
             optimizer.zero_grad()
             
-            # 前向传播
-            outputs = model(inputs)
-            loss = criterion(outputs, labels)
+            # 前向传播（自动混合精度）
+            with torch.autocast('cuda', enabled=use_amp, dtype=amp_dtype):
+                outputs = model(inputs)
+                loss = criterion(outputs, labels)
             
-            # 反向传播和优化
-            loss.backward()
-            optimizer.step()
+            # 反向传播和优化（梯度缩放防止FP16下溢）
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
             
             running_loss += loss.item()
             progress_bar.set_description(f'Epoch {epoch+1}/{epochs}, Loss: {running_loss/(i+1):.6f}')
@@ -297,8 +392,8 @@ def train_model(model, train_loader, criterion, optimizer, device, epochs=100, s
         if epoch_loss < best_loss:
             best_loss = epoch_loss
             counter = 0
-            # 保存最佳模型
-            torch.save(model.state_dict(), 'best_model.pth')
+            # 在内存中保存最佳模型参数，避免训练过程中频繁写盘
+            best_state = {k: v.detach().clone() for k, v in base_model.state_dict().items()}
         else:
             counter += 1
             if counter >= patience:
@@ -307,15 +402,79 @@ def train_model(model, train_loader, criterion, optimizer, device, epochs=100, s
         
         print(f'Epoch {epoch+1}/{epochs}, Loss: {epoch_loss:.6f}, LR: {optimizer.param_groups[0]["lr"]:.8f}')
     
-    # 加载最佳模型
-    model.load_state_dict(torch.load('best_model.pth'))
+    # 加载最佳模型，并在训练结束后一次性写盘
+    if best_state is not None:
+        base_model.load_state_dict(best_state)
+        torch.save(best_state, 'best_model.pth')
     return train_history
 
+def compile_for_training(model, device):
+    """
+    尝试用torch.compile编译训练模型，失败时回退到原始模型
+    Inductor的GPU后端依赖Triton，Windows等未安装Triton的环境直接使用原始模型
+    Args:
+        model: 待训练的模型
+        device: 计算设备
+    Returns:
+        编译后的模型（与原模型共享参数）或原始模型
+    """
+    if not hasattr(torch, 'compile') or device.type != 'cuda':
+        return model
+    if importlib.util.find_spec('triton') is None:
+        print('未安装Triton，跳过torch.compile，使用原始模型训练')
+        return model
+    
+    try:
+        return torch.compile(model, mode="reduce-overhead", fullgraph=True)
+    except RuntimeError as e:
+        # 例如torch 2.0-2.3在Windows上会直接报不支持
+        print(f'torch.compile不可用，使用原始模型训练: {e}')
+        return model
+
+def build_inference_model(model, input_size, device):
+    """
+    构建用于推理的TorchScript模型
+    在模型副本上融合BN后进行脚本化和推理优化，并用虚拟批次预热，避免首次调用的编译延迟
+    注意：优化后的模型已冻结并绑定到指定设备，需在哪种设备上部署就在哪种设备上构建
+    Args:
+        model: 训练好的模型
+        input_size: 输入特征维度
+        device: 计算设备
+    Returns:
+        优化后的TorchScript模型
+    """
+    fused = copy.deepcopy(model).to(device).fuse()
+    scripted = torch.jit.optimize_for_inference(torch.jit.script(fused))
+    
+    with torch.no_grad():
+        scripted(torch.zeros(2, input_size, device=device))
+    
+    return scripted
+
+def build_quantized_model(model, input_size):
+    """
+    构建用于CPU部署的int8量化TorchScript模型
+    融合BN后对全连接层做动态量化（权重int8，激活按批次动态量化），参数量最大的fc1获益最多
+    Args:
+        model: 训练好的模型
+        input_size: 输入特征维度
+    Returns:
+        量化后的TorchScript模型（CPU）
+    """
+    fused = copy.deepcopy(model).cpu().fuse()
+    quantized = torch.ao.quantization.quantize_dynamic(fused, {nn.Linear}, dtype=torch.qint8)
+    scripted = torch.jit.freeze(torch.jit.script(quantized))
+    
+    with torch.no_grad():
+        scripted(torch.zeros(2, input_size))
+    
+    return scripted
+
 def evaluate_model(model, test_loader, criterion, device, scaler_targets=None):
     """
     评估模型
     Args:
-        model: 待评估的模型
+        model: 待评估的模型，未脚本化的模型会先经build_inference_model转换
         test_loader: 测试数据加载器
         criterion: 损失函数
         device: 计算设备
@@ -323,35 +482,47 @@ def evaluate_model(model, test_loader, criterion, device, scaler_targets=None):
     Returns:
         预测值和真实值（原始尺度）
     """
-    model.eval()
-    all_preds = []
-    all_labels = []
+    input_size, output_size = test_loader.dataset[0][0].shape[0], test_loader.dataset[0][1].shape[0]
+    
+    # 传入的是训练用的nn.Module时，在副本上构建推理模型（eval模式并融合BN）
+    if not isinstance(model, torch.jit.ScriptModule):
+        model = build_inference_model(model, input_size, device)
+    
+    # 在设备上预分配预测值和真实值张量，按批次写入对应切片，结束后一次性拷回主机
+    n_samples = len(test_loader.dataset)
+    all_preds = torch.empty((n_samples, output_size), device=device)
+    all_labels = torch.empty((n_samples, output_size), device=device)
+    offset = 0
     test_loss = 0.0
     
+    # 将标准化器的均值和标准差转为设备上的张量，逆变换直接在设备上完成
+    if scaler_targets:
+        targets_mean = torch.as_tensor(scaler_targets.mean_, dtype=torch.float32, device=device)
+        targets_scale = torch.as_tensor(scaler_targets.scale_, dtype=torch.float32, device=device)
+    
     with torch.no_grad():
         for inputs, labels in test_loader:
-            inputs, labels = inputs.to(device), labels.to(device)
+            inputs, labels = inputs.to(device, non_blocking=True), labels.to(device, non_blocking=True)
             
             outputs = model(inputs)
             loss = criterion(outputs, labels)
             
             test_loss += loss.item()
-            all_preds.append(outputs.cpu().numpy())
-            all_labels.append(labels.cpu().numpy())
+            
+            batch_size = inputs.size(0)
+            all_preds[offset:offset + batch_size] = outputs
+            all_labels[offset:offset + batch_size] = labels
+            offset += batch_size
     
     test_loss /= len(test_loader)
     print(f'Test Loss: {test_loss:.6f}')
     
-    # 合并所有批次的预测和标签
-    all_preds = np.vstack(all_preds)
-    all_labels = np.vstack(all_labels)
-    
     # 如果提供了标准化器，则将预测值和真实值转换回原始尺度
     if scaler_targets:
-        all_preds = scaler_targets.inverse_transform(all_preds)
-        all_labels = scaler_targets.inverse_transform(all_labels)
+        all_preds.mul_(targets_scale).add_(targets_mean)
+        all_labels.mul_(targets_scale).add_(targets_mean)
     
-    return all_preds, all_labels
+    return all_preds.cpu().numpy(), all_labels.cpu().numpy()
 
 def visualize_results(predictions, targets, component_names):
     """
@@ -461,35 +632,40 @@ def save_predictions(predictions, targets, component_names, file_path='predictio
     for component in component_names:
         print(f"{component}: MSE={stats[f'{component}_MSE']:.4f}, R²={stats[f'{component}_R²']:.4f}, MAE={stats[f'{component}_MAE']:.4f}")
 
-def feature_importance_analysis(model, spectra_columns, device):
+def feature_importance_analysis(model, spectra_columns, device, chunk_size=256):
     """
     分析特征重要性
+    Args:
+        model: 待分析的模型，未脚本化的模型会先经build_inference_model转换
+        spectra_columns: 波长列名
+        device: 计算设备
+        chunk_size: 每批前向计算的扰动样本数
     """
-    model.eval()
+    if not isinstance(model, torch.jit.ScriptModule):
+        model = build_inference_model(model, len(spectra_columns), device)
     
     # 创建一个随机样本用于分析
     random_sample = torch.randn(1, len(spectra_columns)).to(device)
     
-    # 计算原始输出
+    # 批量扰动特征：第i个样本只在第i个波长上添加小扰动，分块前向以控制显存占用
+    # 每块第0行为未扰动的原始样本，与扰动样本在同一次前向中计算，
+    # 避免不同批大小下卷积算法/TF32舍入不同带来的误差淹没扰动信号
+    n_features = len(spectra_columns)
+    importance_chunks = []
     with torch.no_grad():
-        original_output = model(random_sample)
-    
-    # 初始化特征重要性数组
-    feature_importance = np.zeros(len(spectra_columns))
+        for start in range(0, n_features, chunk_size):
+            end = min(start + chunk_size, n_features)
+            rows = torch.arange(end - start, device=device)
+            perturbed = random_sample.repeat(end - start + 1, 1)
+            perturbed[rows + 1, rows + start] += 0.1  # 添加小扰动
+            
+            outputs = model(perturbed)
+            original_output, perturbed_output = outputs[:1], outputs[1:]
+            
+            # 计算特征重要性（输出变化的L2范数）
+            importance_chunks.append(torch.norm(perturbed_output - original_output, dim=1))
     
-    # 逐个扰动特征，计算输出变化
-    for i in range(len(spectra_columns)):
-        # 创建扰动样本
-        perturbed_sample = random_sample.clone()
-        perturbed_sample[0, i] += 0.1  # 添加小扰动
-        
-        # 计算扰动后的输出
-        with torch.no_grad():
-            perturbed_output = model(perturbed_sample)
-        
-        # 计算特征重要性（输出变化的L2范数）
-        importance = torch.norm(perturbed_output - original_output).item()
-        feature_importance[i] = importance
+    feature_importance = torch.cat(importance_chunks).cpu().numpy()
     
     # 归一化重要性
     feature_importance = feature_importance / np.max(feature_importance)
@@ -533,7 +709,7 @@ def main():
         
         # 加载和预处理数据
         print("\n开始加载和预处理数据...")
-        train_loader, test_loader, scaler_spectra, scaler_targets, X_test, y_test, spectra_columns = load_and_preprocess_data(file_path)
+        train_loader, test_loader, scaler_spectra, scaler_targets, X_test, y_test, spectra_columns = load_and_preprocess_data(file_path, plot=True)
         
         # 初始化模型
         print("\n初始化模型...")
@@ -551,16 +727,23 @@ def main():
         
         # 训练模型
         print('\n开始训练模型...')
+        # 可选：用torch.compile捕获训练图并以CUDA Graphs重放，减少逐算子调度开销
+        # 编译后的模型与原模型共享参数，评估和保存仍使用原模型
+        train_net = compile_for_training(model, device) if use_torch_compile else model
+        
         global train_history  # 为了在visualize_results中使用
-        train_history = train_model(model, train_loader, criterion, optimizer, device, epochs=200, scheduler=scheduler)
+        train_history = train_model(train_net, train_loader, criterion, optimizer, device, epochs=200, scheduler=scheduler)
+        
+        # 构建推理模型（只构建一次，评估和特征重要性分析共用），保留原模型用于保存
+        inference_model = build_inference_model(model, input_size, device)
         
         # 评估模型
         print('\n开始评估模型...')
-        predictions, targets = evaluate_model(model, test_loader, criterion, device, scaler_targets)
+        predictions, targets = evaluate_model(inference_model, test_loader, criterion, device, scaler_targets)
         
         # 特征重要性分析
         print('\n进行特征重要性分析...')
-        feature_importance, top_wavelengths = feature_importance_analysis(model, spectra_columns, device)
+        feature_importance, top_wavelengths = feature_importance_analysis(inference_model, spectra_columns, device)
         
         # 可视化结果
         print('\n可视化分析结果...')
@@ -574,6 +757,23 @@ def main():
         torch.save(model.state_dict(), 'nir_spectroscopy_model.pth')
         print('\n模型已保存为 nir_spectroscopy_model.pth')
         
+        # 保存用于部署的TorchScript模型，统一在CPU上构建以便在无GPU的环境中加载
+        cpu = torch.device('cpu')
+        deploy_model = inference_model if device == cpu else build_inference_model(model, input_size, cpu)
+        deploy_model.save('nir_scripted.pt')
+        print('推理模型已保存为 nir_scripted.pt（CPU）')
+        
+        # 保存用于CPU部署的int8量化模型，保存前在测试集上与FP32模型对比精度
+        quantized_model = build_quantized_model(model, input_size)
+        print('\n评估int8量化模型...')
+        int8_predictions, _ = evaluate_model(quantized_model, test_loader, criterion, cpu, scaler_targets)
+        for i, component in enumerate(component_names):
+            r2_fp32 = r2_score(targets[:, i], predictions[:, i])
+            r2_int8 = r2_score(targets[:, i], int8_predictions[:, i])
+            print(f'{component} R2: FP32 {r2_fp32:.4f}, int8 {r2_int8:.4f}')
+        quantized_model.save('nir_int8.pt')
+        print('int8量化模型已保存为 nir_int8.pt')
+        
         print("\n分析完成！所有结果已保存到 '近红外光谱分析结果' 文件夹中。")
         
     except Exception as e: